@@ -9,12 +9,75 @@ to help debug issues with DXF generation.
 import argparse
 import sys
 import os
+from collections import Counter
 from pathlib import Path
 import ezdxf
 from ezdxf import recover
 from ezdxf.lldxf.const import DXFStructureError, DXFValueError
+from ezdxf.filemanagement import dxf_file_info
+from ezdxf.lldxf.validator import is_binary_dxf_file, is_dxf_file
 # from ezdxf.lldxf.validator import is_valid_handle  # Not available in this version
 
+# Translation table that deletes every hex digit - a valid handle translates to ''
+_NON_HEX = str.maketrans('', '', '0123456789ABCDEFabcdef')
+
+# Sentinel for getattr() lookups of optional DXF attributes
+_MISSING = object()
+
+# Read buffer for ASCII DXF files - the default 8KB is small for large files
+_READ_BUFFER_SIZE = 1 << 20
+
+# Document sections as (section name, Drawing attribute) pairs, and table attributes
+_SECTION_NAMES = ('HEADER', 'TABLES', 'BLOCKS', 'ENTITIES', 'OBJECTS')
+_SECTION_ATTRS = tuple((name, name.lower()) for name in _SECTION_NAMES)
+_TABLE_NAMES = ('layers', 'styles', 'views', 'ucs', 'appids')
+
+# Per-entity warnings are stored as (code, value) tuples and only formatted
+# into text when they are output
+_W_INVALID_HANDLE = 1
+_W_TEXT_NO_CONTENT = 2
+_W_TEXT_NO_INSERT = 3
+_W_TEXT_BAD_HEIGHT = 4
+_W_LINE_NO_POINTS = 5
+_W_POLYLINE_NO_POINTS = 6
+_W_POLYLINE_NOT_CLOSED = 7
+
+_WARNING_TEMPLATES = {
+    _W_INVALID_HANDLE: "Invalid handle format: {}",
+    _W_TEXT_NO_CONTENT: "TEXT entity missing text content: {}",
+    _W_TEXT_NO_INSERT: "TEXT entity missing insert point: {}",
+    _W_TEXT_BAD_HEIGHT: "TEXT entity has invalid height: {}",
+    _W_LINE_NO_POINTS: "LINE entity missing start/end points: {}",
+    _W_POLYLINE_NO_POINTS: "LWPOLYLINE entity has no points: {}",
+    _W_POLYLINE_NOT_CLOSED: "LWPOLYLINE marked as closed but not actually closed: {}",
+}
+
+
+def read_dxf_file(file_path: str):
+    """
+    Load a DXF document like ezdxf.readfile, using a large read buffer.
+    
+    Args:
+        file_path: Path to the DXF file to load
+        
+    Returns:
+        The loaded ezdxf document
+    """
+    # Binary DXF files are read into memory in one go by ezdxf already
+    if is_binary_dxf_file(file_path):
+        return ezdxf.readfile(file_path)
+    
+    if not is_dxf_file(file_path):
+        # Not an OSError, so callers can tell this apart from an unreadable file
+        raise DXFValueError(f"File '{file_path}' is not a DXF file.")
+    
+    info = dxf_file_info(file_path)
+    with open(file_path, 'rt', encoding=info.encoding, errors='surrogateescape',
+              buffering=_READ_BUFFER_SIZE) as fp:
+        doc = ezdxf.read(fp)
+    doc.filename = file_path
+    return doc
+
 
 def validate_dxf_file(file_path: str) -> dict:
     """
@@ -49,26 +112,17 @@ def validate_dxf_file(file_path: str) -> dict:
         return results
     results['file_exists'] = True
     
-    # Check if file is readable
-    try:
-        with open(file_path, 'rb') as f:
-            f.read(1)
-        results['file_readable'] = True
-    except Exception as e:
-        results['errors'].append(f"Cannot read file: {e}")
-        return results
-    
-    # Try to load with ezdxf
+    # Try to load with ezdxf - an unreadable file surfaces as an OSError here
+    results['file_readable'] = True
     try:
         # First try normal loading
-        doc = ezdxf.readfile(file_path)
+        doc = read_dxf_file(file_path)
         results['is_valid_dxf'] = True
         results['dxf_version'] = doc.dxfversion
         print(f"Successfully loaded DXF version: {doc.dxfversion}")
         
     except ezdxf.DXFStructureError as e:
         results['errors'].append(f"DXF Structure Error: {e}")
-        print(f"DXF Structure Error: {e}")
         
         # Try recovery mode
         try:
@@ -83,13 +137,18 @@ def validate_dxf_file(file_path: str) -> dict:
             if auditor.has_errors:
                 for error in auditor.errors:
                     results['warnings'].append(f"Recovery error: {error}")
-                    print(f"Recovery error: {error}")
                     
         except Exception as recovery_error:
             results['errors'].append(f"Recovery failed: {recovery_error}")
             print(f"Recovery failed: {recovery_error}")
             return results
             
+    except OSError as e:
+        results['file_readable'] = False
+        results['errors'].append(f"Cannot read file: {e}")
+        print(f"Cannot read file: {e}")
+        return results
+        
     except Exception as e:
         results['errors'].append(f"Failed to load DXF: {e}")
         print(f"Failed to load DXF: {e}")
@@ -100,7 +159,6 @@ def validate_dxf_file(file_path: str) -> dict:
         analyze_document(doc, results)
     except Exception as e:
         results['errors'].append(f"Analysis error: {e}")
-        print(f"✗ Analysis error: {e}")
     
     return results
 
@@ -109,57 +167,76 @@ def analyze_document(doc, results):
     """Analyze the DXF document structure."""
     
     # Check sections
-    for section_name in ['HEADER', 'TABLES', 'BLOCKS', 'ENTITIES', 'OBJECTS']:
-        if hasattr(doc, section_name.lower()):
-            results['sections'].append(section_name)
+    results['sections'] = [
+        section_name for section_name, attr in _SECTION_ATTRS
+        if hasattr(doc, attr)
+    ]
     
     # Check tables
     if hasattr(doc, 'tables'):
-        for table_name in ['layers', 'styles', 'views', 'ucs', 'appids']:
-            if hasattr(doc.tables, table_name):
-                results['tables'].append(table_name)
+        results['tables'] = [
+            table_name for table_name in _TABLE_NAMES
+            if hasattr(doc.tables, table_name)
+        ]
     
     # Analyze entities
     modelspace = doc.modelspace()
     results['entities_count'] = len(modelspace)
     
-    for entity in modelspace:
-        entity_type = entity.dxftype()
+    # Count all entity types in one pass, then validate the known types
+    # using ezdxf's query filters
+    counts = Counter(entity.dxftype() for entity in modelspace)
+    known_count = 0
+    for entity_type, (key, validate) in _DISPATCH.items():
+        results[key] = counts[entity_type]
+        known_count += results[key]
+        if results[key]:
+            for entity in modelspace.query(entity_type):
+                validate(entity, results)
+    results['other_entities'] = results['entities_count'] - known_count
+    
+    # Simple handle validation - handles should be unique hexadecimal strings.
+    # This runs for strict loads too: ezdxf.read() accepts duplicate handles
+    # (at most it logs a warning), so a clean load does not prove uniqueness.
+    # Duplicates are detected in bulk; the per-handle count only runs when the
+    # unique handles (kept in first-seen order) are fewer than the entities.
+    try:
+        all_handles = [entity.dxf.handle for entity in modelspace]
+        unique_handles = dict.fromkeys(all_handles)
+        
+        if len(unique_handles) != len(all_handles):
+            duplicate_handles = [handle for handle, count in Counter(all_handles).items() if count > 1]
+            results['errors'].append(f"Duplicate handles found: {duplicate_handles}")
         
-        if entity_type == 'TEXT':
-            results['text_entities'] += 1
-            validate_text_entity(entity, results)
-        elif entity_type == 'LINE':
-            results['line_entities'] += 1
-            validate_line_entity(entity, results)
-        elif entity_type == 'LWPOLYLINE':
-            results['polyline_entities'] += 1
-            validate_polyline_entity(entity, results)
-        else:
-            results['other_entities'] += 1
+        # Local aliases avoid global/attribute lookups on every handle
+        non_hex = _NON_HEX
+        add_warning = results['warnings'].append
+        for handle in unique_handles:
+            if not isinstance(handle, str) or handle.translate(non_hex) != '':
+                add_warning((_W_INVALID_HANDLE, handle))
+    except Exception as e:
+        results['warnings'].append(f"Error validating handles: {e}")
     
     # Check layers
-    if hasattr(doc, 'layers'):
-        for layer in doc.layers:
-            results['layers'].append(layer.dxf.name)
-    
-    # Validate handles
-    validate_handles(doc, results)
+    results['layers'] = [layer.dxf.name for layer in getattr(doc, 'layers', ())]
 
 
 def validate_text_entity(entity, results):
     """Validate a TEXT entity."""
     try:
+        dxf = entity.dxf
+        
         # Check required properties
-        if not hasattr(entity.dxf, 'text'):
-            results['warnings'].append(f"TEXT entity missing text content: {entity.dxf.handle}")
+        if getattr(dxf, 'text', _MISSING) is _MISSING:
+            results['warnings'].append((_W_TEXT_NO_CONTENT, dxf.handle))
         
-        if not hasattr(entity.dxf, 'insert'):
-            results['warnings'].append(f"TEXT entity missing insert point: {entity.dxf.handle}")
+        if getattr(dxf, 'insert', _MISSING) is _MISSING:
+            results['warnings'].append((_W_TEXT_NO_INSERT, dxf.handle))
         
         # Check text height
-        if hasattr(entity.dxf, 'height') and entity.dxf.height <= 0:
-            results['warnings'].append(f"TEXT entity has invalid height: {entity.dxf.height}")
+        height = getattr(dxf, 'height', None)
+        if height is not None and height <= 0:
+            results['warnings'].append((_W_TEXT_BAD_HEIGHT, height))
             
     except Exception as e:
         results['warnings'].append(f"Error validating TEXT entity {entity.dxf.handle}: {e}")
@@ -168,9 +245,11 @@ def validate_text_entity(entity, results):
 def validate_line_entity(entity, results):
     """Validate a LINE entity."""
     try:
+        dxf = entity.dxf
+        
         # Check start and end points
-        if not hasattr(entity.dxf, 'start') or not hasattr(entity.dxf, 'end'):
-            results['warnings'].append(f"LINE entity missing start/end points: {entity.dxf.handle}")
+        if getattr(dxf, 'start', _MISSING) is _MISSING or getattr(dxf, 'end', _MISSING) is _MISSING:
+            results['warnings'].append((_W_LINE_NO_POINTS, dxf.handle))
             
     except Exception as e:
         results['warnings'].append(f"Error validating LINE entity {entity.dxf.handle}: {e}")
@@ -179,45 +258,37 @@ def validate_line_entity(entity, results):
 def validate_polyline_entity(entity, results):
     """Validate a LWPOLYLINE entity."""
     try:
-        # Check if it has points
-        if not hasattr(entity, 'get_points') or len(list(entity.get_points())) == 0:
-            results['warnings'].append(f"LWPOLYLINE entity has no points: {entity.dxf.handle}")
+        # Check if it has points - index the stored points directly rather
+        # than copying them all out with get_points()
+        if not hasattr(entity, 'get_points') or len(entity) == 0:
+            results['warnings'].append((_W_POLYLINE_NO_POINTS, entity.dxf.handle))
+            return
             
         # Check if it's closed when it should be
         if hasattr(entity.dxf, 'flags') and entity.dxf.flags & 1:  # Closed flag
-            points = list(entity.get_points())
-            if len(points) > 0:
-                first_point = points[0]
-                last_point = points[-1]
-                if abs(first_point[0] - last_point[0]) > 1e-6 or abs(first_point[1] - last_point[1]) > 1e-6:
-                    results['warnings'].append(f"LWPOLYLINE marked as closed but not actually closed: {entity.dxf.handle}")
+            first_point = entity[0]
+            last_point = entity[-1]
+            if abs(first_point[0] - last_point[0]) > 1e-6 or abs(first_point[1] - last_point[1]) > 1e-6:
+                results['warnings'].append((_W_POLYLINE_NOT_CLOSED, entity.dxf.handle))
                     
     except Exception as e:
         results['warnings'].append(f"Error validating LWPOLYLINE entity {entity.dxf.handle}: {e}")
 
 
-def validate_handles(doc, results):
-    """Validate entity handles."""
-    handles = set()
-    duplicate_handles = []
-    
-    try:
-        for entity in doc.modelspace():
-            handle = entity.dxf.handle
-            if handle in handles:
-                duplicate_handles.append(handle)
-            else:
-                handles.add(handle)
-            
-            # Simple handle validation - handles should be hexadecimal strings
-            if not isinstance(handle, str) or not all(c in '0123456789ABCDEF' for c in handle.upper()):
-                results['warnings'].append(f"Invalid handle format: {handle}")
-    
-    except Exception as e:
-        results['warnings'].append(f"Error validating handles: {e}")
-    
-    if duplicate_handles:
-        results['errors'].append(f"Duplicate handles found: {duplicate_handles}")
+# Entity type -> (results counter key, validator)
+_DISPATCH = {
+    'TEXT': ('text_entities', validate_text_entity),
+    'LINE': ('line_entities', validate_line_entity),
+    'LWPOLYLINE': ('polyline_entities', validate_polyline_entity),
+}
+
+
+def format_warning(warning) -> str:
+    """Return the text of a warning, which is a string or a (code, value) tuple."""
+    if isinstance(warning, tuple):
+        code, value = warning
+        return _WARNING_TEMPLATES[code].format(value)
+    return warning
 
 
 def print_results(results):
@@ -259,7 +330,7 @@ def print_results(results):
     if results['warnings']:
         print(f"\nWARNINGS ({len(results['warnings'])}):")
         for i, warning in enumerate(results['warnings'], 1):
-            print(f"  {i}. {warning}")
+            print(f"  {i}. {format_warning(warning)}")
     else:
         print(f"\nNo warnings found")
     
@@ -312,31 +383,33 @@ Examples:
     
     # Save to output file if requested
     if args.output:
-        with open(args.output, 'w') as f:
-            f.write(f"DXF Validation Report for: {args.file}\n")
-            f.write(f"Generated: {__import__('datetime').datetime.now()}\n\n")
-            
-            f.write("ERRORS:\n")
-            for i, error in enumerate(results['errors'], 1):
-                f.write(f"{i}. {error}\n")
-            
-            f.write("\nWARNINGS:\n")
-            for i, warning in enumerate(results['warnings'], 1):
-                f.write(f"{i}. {warning}\n")
-            
-            f.write(f"\nSUMMARY:\n")
-            f.write(f"Valid DXF: {results['is_valid_dxf']}\n")
-            f.write(f"Entities: {results['entities_count']}\n")
-            f.write(f"Errors: {len(results['errors'])}\n")
-            f.write(f"Warnings: {len(results['warnings'])}\n")
+        lines = [
+            f"DXF Validation Report for: {args.file}\n",
+            f"Generated: {__import__('datetime').datetime.now()}\n\n",
+            "ERRORS:\n",
+        ]
+        lines.extend(f"{i}. {error}\n" for i, error in enumerate(results['errors'], 1))
+        
+        lines.append("\nWARNINGS:\n")
+        lines.extend(f"{i}. {format_warning(warning)}\n" for i, warning in enumerate(results['warnings'], 1))
+        
+        lines.append("\nSUMMARY:\n")
+        lines.append(f"Valid DXF: {results['is_valid_dxf']}\n")
+        lines.append(f"Entities: {results['entities_count']}\n")
+        lines.append(f"Errors: {len(results['errors'])}\n")
+        lines.append(f"Warnings: {len(results['warnings'])}\n")
+        
+        with open(args.output, 'w', buffering=1 << 20) as f:
+            f.write(''.join(lines))
         
         print(f"\nDetailed report saved to: {args.output}")
     
-    # Exit with error code if there are errors
-    if results['errors']:
-        sys.exit(1)
-    else:
-        sys.exit(0)
+    # Exit with error code if there are errors. os._exit skips tearing down the
+    # loaded document's entity graph, which is slow for large files, so flush
+    # the output streams first as they are not flushed for us.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(1 if results['errors'] else 0)
 
 
 if __name__ == '__main__':